@@ -3,7 +3,7 @@ from config import Config
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
-from app.api import bp as api_bp
+from app.api import bp as api_bp, reset_github_adapter
 from flask_bootstrap import Bootstrap
 
 
@@ -16,4 +16,17 @@ migrate = Migrate(app, db)
 login = LoginManager(app)
 login.login_view = 'login'
 
+
+def init_worker():
+    """Called in each gunicorn worker after fork when the app is preloaded.
+
+    Sockets opened in the master (database or GitHub) must not be shared
+    between processes, so throw away both pools and let each worker open
+    its own connections lazily.
+    """
+    with app.app_context():
+        db.engine.dispose()
+    reset_github_adapter()
+
+
 from app import routes, models
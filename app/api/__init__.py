@@ -1,10 +1,124 @@
-from flask import Blueprint
-from flask_dance.contrib.github import make_github_blueprint
+from flask import Blueprint, g, _app_ctx_stack as stack
+from flask_dance.consumer import OAuth2ConsumerBlueprint
+from flask_dance.consumer.requests import OAuth2Session
+from requests.adapters import HTTPAdapter
+from calendar import timegm
+from datetime import datetime, timedelta
+from config import Config
+import requests
 import os
 bp = Blueprint('api', __name__)
 
 
-github_blueprint = make_github_blueprint(client_id=os.environ.get('CLIENT_ID', None),
-                                         client_secret=os.environ.get('CLIENT_SECRET', None))
+def make_github_session():
+    """Build a lightweight session on top of the process-wide GitHub connection pool.
+
+    Sessions are not thread-safe and carry cookies, so build one per call and
+    only share the adapter.
+    """
+    session = requests.Session()
+    session.mount('https://', github_adapter)
+    session.mount('http://', github_adapter)
+    return session
+
+
+def reset_github_adapter():
+    """Drop pooled GitHub connections, e.g. ones inherited from the gunicorn master after a fork."""
+    global github_adapter
+    github_adapter.close()
+    github_adapter = HTTPAdapter(pool_maxsize=Config.GITHUB_POOL_MAXSIZE)
+
+
+class PooledOAuth2Session(OAuth2Session):
+    """Flask-Dance builds one session per request; share the process-wide adapter so logins reuse connections."""
+
+    def __init__(self, *args, **kwargs):
+        super(PooledOAuth2Session, self).__init__(*args, **kwargs)
+        self.mount('https://', github_adapter)
+        self.mount('http://', github_adapter)
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', Config.GITHUB_TIMEOUT)
+        return super(PooledOAuth2Session, self).request(*args, **kwargs)
+
+
+class GitHubBlueprint(OAuth2ConsumerBlueprint):
+    """GitHub OAuth blueprint that keeps its session on ``flask.g``.
+
+    Flask-Dance 3.0 caches the session, and the user's token with it, on the
+    blueprint itself, which threaded workers share between requests. This
+    mirrors ``make_github_blueprint`` but builds one session per request.
+    """
+
+    def __init__(self, **kwargs):
+        super(GitHubBlueprint, self).__init__(
+            'github', __name__,
+            base_url=Config.GITHUB_API_URL + '/',
+            authorization_url='https://github.com/login/oauth/authorize',
+            token_url='https://github.com/login/oauth/access_token',
+            session_class=PooledOAuth2Session,
+            **kwargs
+        )
+        self.from_config['client_id'] = 'GITHUB_OAUTH_CLIENT_ID'
+        self.from_config['client_secret'] = 'GITHUB_OAUTH_CLIENT_SECRET'
+        self.before_app_request(self.set_applocal_session)
+
+    def set_applocal_session(self):
+        # flask_dance.contrib.github.github looks the session up here.
+        stack.top.github_oauth = self.session
+
+    @property
+    def session(self):
+        if 'github_oauth_session' not in g:
+            session = self.session_class(
+                client_id=self._client_id,
+                client=self.client,
+                auto_refresh_url=self.auto_refresh_url,
+                auto_refresh_kwargs=self.auto_refresh_kwargs,
+                scope=self.scope,
+                state=self.state,
+                blueprint=self,
+                base_url=self.base_url,
+                **self.kwargs
+            )
+
+            def token_updater(token):
+                self.token = token
+
+            session.token_updater = token_updater
+            g.github_oauth_session = self.session_created(session)
+        return g.github_oauth_session
+
+    @property
+    def token(self):
+        _token = self.storage.get(self)
+        if _token and _token.get('expires_in') and _token.get('expires_at'):
+            expires_at = datetime.utcfromtimestamp(_token['expires_at'])
+            expires_in = expires_at - datetime.utcnow()
+            _token['expires_in'] = expires_in.total_seconds()
+        return _token
+
+    @token.setter
+    def token(self, value):
+        _token = value
+        if _token and _token.get('expires_in') is not None:
+            expires_at = datetime.utcnow() + timedelta(seconds=int(_token['expires_in']))
+            _token['expires_at'] = timegm(expires_at.utctimetuple())
+        self.storage.set(self, _token)
+        g.pop('github_oauth_session', None)
+
+    @token.deleter
+    def token(self):
+        self.storage.delete(self)
+        g.pop('github_oauth_session', None)
+
+    def teardown_session(self, exception=None):
+        g.pop('github_oauth_session', None)
+
+
+github_adapter = HTTPAdapter(pool_maxsize=Config.GITHUB_POOL_MAXSIZE)
+
+github_blueprint = GitHubBlueprint(client_id=os.environ.get('CLIENT_ID', None),
+                                   client_secret=os.environ.get('CLIENT_SECRET', None))
 
 from app.api import users
@@ -1,18 +1,19 @@
-import requests
-from flask import Flask, request, make_response
+from flask import Flask, request, make_response, current_app
 import json
-from app.api import bp
+from app.api import bp, make_github_session
 import collections
 
 @bp.route('/<git_name>')
 def user_get_lang(git_name, token):
-    github_url = 'https://api.github.com/users/' + git_name + '/repos'
+    github_url = current_app.config['GITHUB_API_URL'] + '/users/' + git_name + '/repos'
     payload = {}
     headers = {
         'Authorization': 'Bearer ' + token
     }
+    github_session = make_github_session()
 
-    response = requests.request("GET", github_url, headers=headers, data=payload)
+    response = github_session.request("GET", github_url, headers=headers, data=payload,
+                                      timeout=current_app.config['GITHUB_TIMEOUT'])
     language_dict = {}
 
     new_bytes = response.content
@@ -21,7 +22,8 @@ def user_get_lang(git_name, token):
     for i in range(len(new_json)):
         new_url = new_json[i]["languages_url"]
         new_payload = {}
-        new_url_response = requests.request("GET", new_url, headers=headers, data=new_payload)
+        new_url_response = github_session.request("GET", new_url, headers=headers, data=new_payload,
+                                                  timeout=current_app.config['GITHUB_TIMEOUT'])
 
         lang_cont = new_url_response.content
         lang_json = json.loads(lang_cont)
@@ -38,13 +40,14 @@ def user_get_lang(git_name, token):
 
 @bp.route('/<git_name>/repositories')
 def user_get_repos(git_name, token):
-    github_url = 'https://api.github.com/users/' + git_name + '/repos'
+    github_url = current_app.config['GITHUB_API_URL'] + '/users/' + git_name + '/repos'
     payload = {}
     headers = {
         'Authorization': 'Bearer ' + token
     }
 
-    response = requests.request("GET", github_url, headers=headers, data=payload)
+    response = make_github_session().request("GET", github_url, headers=headers, data=payload,
+                                            timeout=current_app.config['GITHUB_TIMEOUT'])
     repos_dict = {}
 
     new_bytes = response.content
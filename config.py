@@ -12,3 +12,21 @@ class Config(object):
 
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Each gunicorn worker keeps its own engine, so the per-dyno connection
+    # count is workers * (pool_size + max_overflow). Keep pool_size close to
+    # the number of worker threads (GUNICORN_THREADS). Without DATABASE_URL
+    # Flask-SQLAlchemy falls back to SQLite, whose pool takes none of these.
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    if DATABASE_URL and not DATABASE_URL.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 3)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 300)),
+            'pool_pre_ping': True,
+        }
+
+    GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+    GITHUB_POOL_MAXSIZE = int(os.environ.get('GITHUB_POOL_MAXSIZE', 10))
+    GITHUB_TIMEOUT = int(os.environ.get('GITHUB_TIMEOUT', 10))
@@ -0,0 +1,19 @@
+import multiprocessing
+import os
+
+# GitHub calls in home() spend most of their time waiting on the network, so
+# use threaded workers; a slow call then ties up one thread, not a worker.
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2, 4)))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+
+# Import the app once in the master so workers fork with it already loaded.
+preload_app = True
+
+
+def post_fork(server, worker):
+    from app import init_worker
+    init_worker()
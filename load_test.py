@@ -0,0 +1,269 @@
+"""Load test for the gunicorn serving mode.
+
+Starts a local GitHub API stub, boots gunicorn with gunicorn.conf.py against
+it and fires a mix of GitHub-bound (first login through ``/``) and DB-bound
+(``/profile``) requests, then prints throughput and latency per kind.
+
+DATABASE_URL must point at a throwaway PostgreSQL database; the script creates
+the tables if needed and removes the users it adds when it is done.
+
+    DATABASE_URL=postgresql://localhost/connector_load python load_test.py
+    DATABASE_URL=... python load_test.py --worker-class sync   # baseline
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+
+USER_PREFIX = 'loadtest_'
+
+
+class GitHubStubHandler(BaseHTTPRequestHandler):
+    """Answers the handful of GitHub endpoints the app calls, after a fixed delay."""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        token = self.headers.get('Authorization', '').split(' ')[-1]
+        parts = self.path.strip('/').split('/')
+        base = 'http://{}:{}'.format(*self.server.server_address)
+
+        if parts == ['user']:
+            body = {'login': token}
+        elif len(parts) == 3 and parts[0] == 'users' and parts[2] == 'repos':
+            body = [{'name': 'repo{}'.format(i),
+                     'html_url': 'https://github.com/{}/repo{}'.format(parts[1], i),
+                     'languages_url': '{}/repos/{}/repo{}/languages'.format(base, parts[1], i)}
+                    for i in range(self.server.repos)]
+        elif len(parts) == 4 and parts[0] == 'repos' and parts[3] == 'languages':
+            body = {'Python': 1200, 'HTML': 300}
+        else:
+            self.send_error(404)
+            return
+
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_github_stub(latency, repos):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GitHubStubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.repos = repos
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('gunicorn did not start listening on port {}'.format(port))
+
+
+def create_users(github_count, db_count):
+    """Add the load-test users and return ((username, cookie) pairs, db_cookies)."""
+    from flask.sessions import SecureCookieSessionInterface
+    from app import app, db
+    from app.models import User
+
+    with app.app_context():
+        db.create_all()
+        remove_users()
+
+        github_users = [User(username='{}gh{}'.format(USER_PREFIX, i),
+                             email='{}gh{}@example.com'.format(USER_PREFIX, i))
+                        for i in range(github_count)]
+        db_users = [User(username='{}db{}'.format(USER_PREFIX, i),
+                         email='{}db{}@example.com'.format(USER_PREFIX, i))
+                    for i in range(db_count)]
+        for user in db_users:
+            user.languages = {'Python': 1000}
+            user.repos = {}
+            user.github = user.username
+        db.session.add_all(github_users + db_users)
+        db.session.commit()
+
+        # Sign the same session cookie Flask-Login and Flask-Dance would set
+        # after a real login, with the username standing in for the token.
+        serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+
+        def cookie(user):
+            return serializer.dumps({
+                '_user_id': str(user.id),
+                '_fresh': True,
+                'github_oauth_token': {'access_token': user.username, 'token_type': 'bearer'},
+            })
+
+        return [(u.username, cookie(u)) for u in github_users], [cookie(u) for u in db_users]
+
+
+def remove_users():
+    from app import app, db
+    from app.models import User
+
+    with app.app_context():
+        User.query.filter(User.username.startswith(USER_PREFIX)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def check_plain_requests(port):
+    """Fail fast if routes that never touch GitHub do not render.
+
+    Catches errors raised by app-wide request hooks, such as blueprint
+    teardown, that would otherwise show up as a 500 on every route.
+    """
+    for path in ('/login', '/about'):
+        response = requests.get('http://127.0.0.1:{}{}'.format(port, path), timeout=30)
+        if response.status_code != 200:
+            raise RuntimeError('GET {} returned {}'.format(path, response.status_code))
+
+
+def check_github_users(repos):
+    """Return the GitHub-bound users whose row did not end up with their own GitHub data.
+
+    A 302 from ``/`` only says the request finished; a token leaking between
+    concurrent requests would still redirect but save another user's login.
+    """
+    from app import app
+    from app.models import User
+
+    with app.app_context():
+        users = User.query.filter(User.username.startswith(USER_PREFIX + 'gh')).all()
+        return [user.username for user in users
+                if user.github != user.username or not user.languages or len(user.repos or {}) != repos]
+
+
+def run_load(port, github_cookies, db_cookies, total, concurrency):
+    url = 'http://127.0.0.1:{}'.format(port)
+    jobs = []
+    github_iter = iter(github_cookies)
+    for i in range(total):
+        if i % 2 == 0:
+            username, cookie = next(github_iter)
+            jobs.append(('github', username, '/', cookie))
+        else:
+            jobs.append(('db', None, '/profile', db_cookies[i % len(db_cookies)]))
+
+    local = threading.local()
+
+    def fire(job):
+        kind, username, path, cookie = job
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.time()
+        response = local.session.get(url + path, cookies={'session': cookie},
+                                     allow_redirects=False, timeout=120)
+        ok = response.status_code in (200, 302) and '/login' not in response.headers.get('Location', '')
+        return kind, username, time.time() - start, ok
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fire, jobs))
+    return results, time.time() - start
+
+
+def report(results, elapsed, stub, mismatched):
+    print('{} requests in {:.2f}s: {:.1f} req/s, {} GitHub stub connections'.format(
+        len(results), elapsed, len(results) / elapsed, stub.connections))
+    for kind in ('github', 'db'):
+        latencies = sorted(t for k, _, t, _ in results if k == kind)
+        if not latencies:
+            continue
+        failed = [user for k, user, _, ok in results if k == kind and not ok]
+        errors = len(set(failed) | set(mismatched)) if kind == 'github' else len(failed)
+        print('  {:<6} n={:<5} p50={:.3f}s p95={:.3f}s max={:.3f}s errors={}'.format(
+            kind, len(latencies), latencies[len(latencies) // 2],
+            latencies[int(len(latencies) * 0.95) - 1], latencies[-1], errors))
+    if mismatched:
+        print('  users saved with wrong or missing GitHub data: {}'.format(', '.join(sorted(mismatched))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--github-latency', type=float, default=0.2,
+                        help='seconds the stub waits before answering each call')
+    parser.add_argument('--repos', type=int, default=5,
+                        help='repositories per stub user (one languages call each)')
+    parser.add_argument('--worker-class', default=None,
+                        help='override GUNICORN_WORKER_CLASS (gthread or sync, for a baseline)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        sys.exit('DATABASE_URL must point at a throwaway PostgreSQL database')
+
+    stub = start_github_stub(args.github_latency, args.repos)
+    stub_url = 'http://{}:{}'.format(*stub.server_address)
+    os.environ['GITHUB_API_URL'] = stub_url
+    os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
+
+    github_count = (args.requests + 1) // 2
+    github_cookies, db_cookies = create_users(github_count, args.concurrency)
+
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_THREADS=str(args.threads))
+    if args.worker_class:
+        env['GUNICORN_WORKER_CLASS'] = args.worker_class
+    if args.worker_class == 'sync':
+        # gunicorn silently upgrades sync workers to gthread when threads > 1.
+        env['GUNICORN_THREADS'] = '1'
+    here = os.path.dirname(os.path.abspath(__file__))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:{}'.format(port),
+         'wsgi:app'], cwd=here, env=env)
+
+    try:
+        wait_for_port(port)
+        check_plain_requests(port)
+        results, elapsed = run_load(port, github_cookies, db_cookies, args.requests, args.concurrency)
+        print('worker class: {}, workers: {}, threads: {}, GitHub latency: {}s'.format(
+            env.get('GUNICORN_WORKER_CLASS', 'gthread'), args.workers, env['GUNICORN_THREADS'],
+            args.github_latency))
+        report(results, elapsed, stub, check_github_users(args.repos))
+    finally:
+        server.terminate()
+        server.wait()
+        stub.shutdown()
+        remove_users()
+
+
+if __name__ == '__main__':
+    main()